@@ -3,24 +3,134 @@ LLM Council - Flask Server
 Serves the frontend and provides API/SSE endpoints for the council deliberation.
 """
 
-import time
+import os
 import json
+import math
+import queue
+import threading
+import time
+import uuid
 from flask import Flask, render_template, request, Response, stream_with_context
+from chat import assets, metrics, sse, tracing
+from chat.admission import AdmissionController
+from chat.cancellation import CancelToken, DeliberationCancelled
 from chat.council import query_llm, collect_votes, arbiter_eliminate, ensemble_result
-from chat.config import COUNCIL_MEMBERS, ARBITER_MODEL
-
-app = Flask(__name__)
+from chat.state import get_backend
+from chat.config import COUNCIL_MEMBERS, ARBITER_MODEL, PHASE_SETTINGS
+
+# Static files are served from the fingerprinted bundle below, not /static.
+app = Flask(__name__, static_folder=None)
+
+# Seconds of silence before a heartbeat comment is written to the stream.
+# Writing is how the server notices a closed tab, so this bounds how long an
+# abandoned deliberation keeps its LLM calls running.
+KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE_INTERVAL", "5"))
+
+# SSE transport: "auto" compresses streams with brotli/gzip when the client
+# accepts it, "off" never does. Events produced within SSE_COALESCE_WINDOW
+# seconds of each other are sent in a single flush.
+SSE_COMPRESSION = os.getenv("SSE_COMPRESSION", "auto")
+SSE_COALESCE_WINDOW = float(os.getenv("SSE_COALESCE_WINDOW", "0.025"))
+
+# How often a resumed stream polls the state backend for new events.
+RESUME_POLL_INTERVAL = float(os.getenv("SSE_RESUME_POLL_INTERVAL", "0.5"))
+
+# Admission control. Every open stream (running or queued) holds a server
+# thread, so MAX_CONCURRENT_DELIBERATIONS + MAX_QUEUED_DELIBERATIONS must stay
+# below gunicorn's --threads (8): the spare threads answer the 503 fast path,
+# the page, assets and /api/jobs while the council is full. MAX_QUEUE_WAIT
+# (seconds) further shrinks the queue when observed deliberations get slow.
+admission = AdmissionController(
+    max_active=int(os.getenv("MAX_CONCURRENT_DELIBERATIONS", "3")),
+    max_queued=int(os.getenv("MAX_QUEUED_DELIBERATIONS", "3")),
+    max_wait=float(os.getenv("MAX_QUEUE_WAIT", "300")),
+)
+
+# Seconds a deliberation's record and event log stay in the state backend.
+# Detached deliberations ({"detach": true}) survive a client disconnect and
+# are collected from /api/jobs/<id>.
+DELIBERATION_TTL = int(os.getenv("DELIBERATION_TTL", "86400"))
+
+# Frontend delivery. CSS/JS are minified, fingerprinted and precompressed once
+# (`python -m chat.assets` at build time, or in memory at startup), so they can
+# be cached forever. The page and /api/config only change on deploy: browsers
+# revalidate them with ETags, and a CDN may keep them for CDN_MAX_AGE seconds.
+ASSET_MANIFEST, ASSETS = assets.load()
+CDN_MAX_AGE = int(os.getenv("CDN_MAX_AGE", "300"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+app.jinja_env.globals["asset_url"] = lambda name: f"/assets/{ASSET_MANIFEST[name]}"
+
+_page = None
+_config = assets.Asset(
+    json.dumps({"members": COUNCIL_MEMBERS, "arbiter": ARBITER_MODEL}).encode("utf-8"),
+    "application/json",
+)
 
 
 @app.route("/")
 def index():
-    return render_template("index.html")
+    global _page
+    if _page is None:
+        # Renders once per process; the template has no per-request state.
+        _page = assets.Asset(
+            render_template("index.html").encode("utf-8"), "text/html; charset=utf-8"
+        )
+    return _cached_response(_page, f"public, no-cache, s-maxage={CDN_MAX_AGE}")
+
+
+@app.route("/assets/<name>")
+def get_asset(name):
+    """Serve a fingerprinted CSS/JS bundle; its URL changes whenever it does."""
+    asset = ASSETS.get(name)
+    if asset is None:
+        return {"error": "Unknown asset"}, 404
+    return _cached_response(asset, IMMUTABLE)
 
 
 @app.route("/api/config")
 def get_config():
     """Return council configuration."""
-    return {"members": COUNCIL_MEMBERS, "arbiter": ARBITER_MODEL}
+    return _cached_response(
+        _config, f"public, max-age={CDN_MAX_AGE}, s-maxage={CDN_MAX_AGE}"
+    )
+
+
+@app.route("/api/metrics")
+def get_metrics():
+    """Return process-wide counters (LLM calls, cancellations, ...)."""
+    return dict(metrics.snapshot(), admission=admission.stats())
+
+
+@app.route("/api/jobs/<deliberation_id>")
+def get_job(deliberation_id):
+    """Return the status (and final answer, once done) of a deliberation."""
+    job = get_backend().get(f"deliberation:{deliberation_id}")
+    if job is None:
+        return {"error": "Unknown deliberation"}, 404
+    return job
+
+
+@app.route("/api/jobs/<deliberation_id>/events")
+def get_job_events(deliberation_id):
+    """Return every event a deliberation has emitted so far, in order."""
+    if get_backend().get(f"deliberation:{deliberation_id}") is None:
+        return {"error": "Unknown deliberation"}, 404
+    events = get_backend().read_list(f"log:{deliberation_id}")
+    return {"events": [{"event": name, "data": data} for name, data in events]}
+
+
+@app.route("/api/trace/<deliberation_id>")
+def get_trace(deliberation_id):
+    """
+    Return a deliberation's spans as Chrome trace-event JSON (load it in
+    Perfetto). Only sampled deliberations (TRACE_SAMPLE_RATE, or a request
+    with {"trace": true}) are recorded.
+    """
+    trace = tracing.get_trace(deliberation_id)
+    if trace is None:
+        return {"error": "No trace recorded for this deliberation"}, 404
+    return trace
 
 
 @app.route("/api/convene", methods=["POST"])
@@ -28,37 +138,295 @@ def convene():
     """
     Stream the council deliberation as Server-Sent Events.
     Each event is a JSON object describing what's happening.
+
+    The deliberation runs on its own thread. If the client disconnects, its
+    cancel token fires and every outstanding LLM call is aborted, unless the
+    request asked for {"detach": true}.
+
+    When the council is busy the caller waits in line and receives `queued`
+    events; when the line is full the request is rejected with 503.
     """
     data = request.json
     question = data.get("question", "")
+    detach = bool(data.get("detach", False))
+    force_trace = bool(data.get("trace", False))
 
     if not question:
         return {"error": "No question provided"}, 400
 
+    ticket = admission.try_enter()
+    if ticket is None:
+        metrics.increment("convene_rejected")
+        retry_after = admission.retry_after()
+        return (
+            {"error": "The council is at capacity", "retry_after": retry_after},
+            503,
+            {"Retry-After": str(retry_after)},
+        )
+
+    deliberation_id = uuid.uuid4().hex
+    cancel_token = CancelToken()
+    events = queue.Queue()
+    stream = sse.EventStream(
+        sse.negotiate_encoding(
+            request.headers.get("Accept-Encoding"), SSE_COMPRESSION != "off"
+        )
+    )
+    trace = tracing.start_trace(deliberation_id, force=force_trace)
+    queued_at = time.perf_counter()
+
+    _save_deliberation(
+        deliberation_id,
+        question=question,
+        detached=detach,
+        status="running" if ticket.admitted else "queued",
+        answer=None,
+    )
+
+    worker = threading.Thread(
+        target=_pump,
+        args=(deliberation_id, question, cancel_token, events, ticket, trace, queued_at),
+        name=f"deliberation-{deliberation_id[:8]}",
+        daemon=True,
+    )
+    if detach:
+        # A detached run owns its ticket from the start and waits in line on
+        # its own, so it survives the client leaving while still queued.
+        worker.start()
+
     def generate():
-        active_members = COUNCIL_MEMBERS.copy()
-        eliminated_answers = {}
-        last_answers = {}
-        round_num = 1
-
-        # Start
-        yield sse_event("start", {"question": question, "members": active_members})
-        time.sleep(0.5)
-
-        while len(active_members) > 1:
-            # --- ROUND START ---
-            yield sse_event(
-                "round_start", {"round": round_num, "survivors": active_members}
+        finished = False
+        try:
+            if not ticket.admitted:
+                metrics.increment("convene_queued")
+            # Each update is also a write, so leaving the line is noticed too.
+            while not ticket.admitted:
+                queued = {
+                    "position": ticket.position,
+                    "estimated_wait": math.ceil(ticket.estimated_wait),
+                }
+                yield stream.flush([stream.event("queued", queued)])
+                ticket.wait(KEEPALIVE_INTERVAL)
+
+            if not detach:
+                worker.start()
+            finished = yield from sse.drain(
+                events, stream, SSE_COALESCE_WINDOW, KEEPALIVE_INTERVAL
             )
-            time.sleep(0.3)
+        finally:
+            # GeneratorExit lands here when the server fails to write to a
+            # closed connection.
+            if not finished and not detach:
+                print(f"🔌 Client left deliberation {deliberation_id}, cancelling")
+                metrics.increment("client_disconnects")
+                cancel_token.cancel("client disconnected")
+            _record_transport(deliberation_id, stream)
+
+    def release_unstarted():
+        # Once started, the worker owns the ticket (detached ones start at once).
+        if worker.ident is None:
+            ticket.release()
+            _save_deliberation(deliberation_id, status="cancelled")
+
+    response = _event_stream_response(generate(), stream)
+    response.headers["X-Deliberation-Id"] = deliberation_id
+    response.headers["X-Trace"] = "1" if trace is not None else "0"
+    response.call_on_close(release_unstarted)
+    return response
+
+
+@app.route("/api/convene/<deliberation_id>")
+def resume(deliberation_id):
+    """
+    Re-attach to a deliberation's event stream, e.g. after a dropped
+    connection. Events after the `Last-Event-ID` header (or `last_event_id`
+    query parameter) are replayed from the state backend, then new ones follow
+    until the deliberation ends. Works from any worker. A deliberation that was
+    not detached is cancelled when its original stream drops, so this mainly
+    serves detached runs.
+    """
+    backend = get_backend()
+    if backend.get(f"deliberation:{deliberation_id}") is None:
+        return {"error": "Unknown deliberation"}, 404
 
-            # Phase: Answering / Re-evaluating
-            phase_name = "answering" if round_num == 1 else "re-evaluating"
-            yield sse_event("phase", {"phase": phase_name, "round": round_num})
+    last_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id", "0"
+    )
+    try:
+        seen = max(0, int(last_id))
+    except ValueError:
+        return {"error": "Last-Event-ID must be an integer"}, 400
+
+    stream = sse.EventStream(
+        sse.negotiate_encoding(
+            request.headers.get("Accept-Encoding"), SSE_COMPRESSION != "off"
+        )
+    )
 
-            current_answers = {}
+    def generate():
+        nonlocal seen
+        idle_since = time.monotonic()
+        try:
+            while True:
+                new = backend.read_list(f"log:{deliberation_id}", start=seen)
+                if new:
+                    yield stream.flush(
+                        [
+                            stream.event(event_type, data, seen + offset)
+                            for offset, (event_type, data) in enumerate(new, 1)
+                        ]
+                    )
+                    seen += len(new)
+                    idle_since = time.monotonic()
+                    continue
+
+                record = backend.get(f"deliberation:{deliberation_id}") or {}
+                if record.get("status") not in ("queued", "running"):
+                    yield stream.close()
+                    return
+                if time.monotonic() - idle_since >= KEEPALIVE_INTERVAL:
+                    yield stream.heartbeat()
+                    idle_since = time.monotonic()
+                time.sleep(RESUME_POLL_INTERVAL)
+        finally:
+            _record_transport(deliberation_id, stream, resumed=True)
+
+    return _event_stream_response(generate(), stream)
+
+
+def _cached_response(asset, cache_control):
+    """Serve a precomputed Asset with its ETag, answering 304 when it matches."""
+    encoding, body = asset.select(request.headers.get("Accept-Encoding"))
+    headers = {
+        "Cache-Control": cache_control,
+        "ETag": f'"{asset.etag_for(encoding)}"',
+        "Vary": "Accept-Encoding",
+    }
+    if asset.etag_for(encoding) in request.if_none_match:
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, content_type=asset.content_type, headers=headers)
+
+
+def _event_stream_response(chunks, stream):
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        "Vary": "Accept-Encoding",
+    }
+    if stream.encoding:
+        headers["Content-Encoding"] = stream.encoding
+    return Response(
+        stream_with_context(chunks), mimetype="text/event-stream", headers=headers
+    )
+
+
+def _record_transport(deliberation_id, stream, resumed=False):
+    """Add one stream's byte and flush counts to metrics and the deliberation record."""
+    stats = stream.stats()
+    metrics.increment("sse_streams")
+    metrics.increment("sse_events", stats["events"])
+    metrics.increment("sse_flushes", stats["flushes"])
+    metrics.increment("sse_raw_bytes", stats["raw_bytes"])
+    metrics.increment("sse_wire_bytes", stats["wire_bytes"])
+    if not resumed:
+        _save_deliberation(deliberation_id, transport=stats)
+
+
+def _pump(deliberation_id, question, cancel_token, events, ticket, trace, queued_at):
+    """
+    Run one deliberation on a worker thread, feeding its events to the SSE
+    queue. Waits for `ticket` to be admitted first (only detached runs start
+    before that).
+    """
+    status = "failed"
+    answer = None
+    try:
+        while not ticket.wait(KEEPALIVE_INTERVAL):
+            cancel_token.raise_if_cancelled()
+        if trace is not None:
+            trace.record("admission", queued_at, time.perf_counter(), "admission")
+        _save_deliberation(deliberation_id, status="running")
+        with tracing.activate(trace), tracing.span("deliberation", cat="deliberation"):
+            council = deliberate(deliberation_id, question, cancel_token)
+            # Sequence numbers double as SSE ids and offsets into the event log.
+            for seq, (event_type, data) in enumerate(council, 1):
+                if event_type == "final_answer":
+                    answer = data["answer"]
+                _log_event(deliberation_id, event_type, data)
+                events.put((seq, event_type, data))
+        status = "done"
+    except DeliberationCancelled as e:
+        status = "cancelled"
+        print(f"🛑 Deliberation {deliberation_id} cancelled: {e}")
+    except Exception as e:
+        print(f"❌ Deliberation {deliberation_id} crashed: {type(e).__name__}: {e}")
+    finally:
+        try:
+            ticket.release(completed=status == "done")
+            metrics.increment(f"deliberations_{status}")
+            _save_deliberation(deliberation_id, status=status, answer=answer)
+            if trace is not None:
+                tracing.store_trace(trace)
+        finally:
+            # Last, so a client that sees the stream end can read all of the
+            # above, and always, so the stream ends even if bookkeeping fails.
+            events.put(None)
+
+
+def _save_deliberation(deliberation_id, **fields):
+    """Merge `fields` into the deliberation's record in the state backend."""
+    try:
+        get_backend().update(
+            f"deliberation:{deliberation_id}",
+            dict(fields, id=deliberation_id),
+            ttl=DELIBERATION_TTL,
+        )
+    except Exception as e:
+        print(f"⚠️  Could not save deliberation {deliberation_id}: {e}")
+
+
+def _log_event(deliberation_id, event_type, data):
+    """Append one event to the deliberation's log in the state backend."""
+    try:
+        get_backend().append(
+            f"log:{deliberation_id}", [event_type, data], ttl=DELIBERATION_TTL
+        )
+    except Exception as e:
+        print(f"⚠️  Could not log {event_type} for {deliberation_id}: {e}")
+
+
+def deliberate(deliberation_id, question, cancel_token):
+    """
+    The council loop. Yields (event_type, data) pairs as the debate unfolds.
+    Raises DeliberationCancelled as soon as `cancel_token` fires.
+    """
+    active_members = COUNCIL_MEMBERS.copy()
+    eliminated_answers = {}
+    last_answers = {}
+    round_num = 1
+
+    # Start
+    yield (
+        "start",
+        {"id": deliberation_id, "question": question, "members": active_members},
+    )
+    _pause(cancel_token, 0.5)
+
+    while len(active_members) > 1:
+        # --- ROUND START ---
+        yield ("round_start", {"round": round_num, "survivors": active_members})
+        _pause(cancel_token, 0.3)
+
+        # Phase: Answering / Re-evaluating
+        phase_name = "answering" if round_num == 1 else "re-evaluating"
+        yield ("phase", {"phase": phase_name, "round": round_num})
+
+        current_answers = {}
+        with tracing.span(phase_name, cat="phase", round=round_num):
             for member in active_members:
-                yield sse_event("member_thinking", {"member": member})
+                yield ("member_thinking", {"member": member})
 
                 if round_num == 1:
                     messages = [{"role": "user", "content": question}]
@@ -77,95 +445,94 @@ def convene():
                         },
                     ]
 
-                response = query_llm(member, messages)
+                response = query_llm(
+                    member,
+                    messages,
+                    cancel_token=cancel_token,
+                    **PHASE_SETTINGS["answer"],
+                )
+                cancel_token.raise_if_cancelled()
                 answer_text = response or "Failed to generate answer."
                 current_answers[member] = answer_text
 
-                yield sse_event(
-                    "member_answered", {"member": member, "answer": answer_text}
-                )
-                time.sleep(0.2)
-
-            # Store answers for next round context
-            last_answers = current_answers.copy()
+                yield ("member_answered", {"member": member, "answer": answer_text})
+                _pause(cancel_token, 0.2)
 
-            # Special case: If only 2 members remain, skip voting/elimination
-            # The Arbiter will synthesize the final result from here.
-            if len(active_members) == 2:
-                break
+        # Store answers for next round context
+        last_answers = current_answers.copy()
 
-            # Phase: Voting
-            yield sse_event("phase", {"phase": "voting", "round": round_num})
-            votes, map_data, detailed_votes = collect_votes(question, current_answers)
+        # Special case: If only 2 members remain, skip voting/elimination
+        # The Arbiter will synthesize the final result from here.
+        if len(active_members) == 2:
+            break
 
-            # Send individual votes
-            for voter, vote_text in detailed_votes.items():
-                yield sse_event("member_voted", {"member": voter, "vote": vote_text})
-                time.sleep(0.2)
+        # Phase: Voting
+        yield ("phase", {"phase": "voting", "round": round_num})
+        votes, map_data, detailed_votes = collect_votes(
+            question, current_answers, cancel_token=cancel_token
+        )
 
-            yield sse_event("votes_collected", {"votes": votes})
-            time.sleep(0.5)
+        # Send individual votes
+        for voter, vote_text in detailed_votes.items():
+            yield ("member_voted", {"member": voter, "vote": vote_text})
+            _pause(cancel_token, 0.2)
 
-            # Phase: Arbiter Elimination
-            yield sse_event("phase", {"phase": "arbiter", "round": round_num})
-            yield sse_event("arbiter_thinking", {})
-            time.sleep(0.5)
+        # The vote texts already went out in member_voted events.
+        yield ("votes_collected", {"count": len(votes)})
+        _pause(cancel_token, 0.5)
 
-            loser, reasoning = arbiter_eliminate(
-                question, current_answers, votes, map_data
-            )
-            yield sse_event(
-                "arbiter_decision", {"reasoning": reasoning, "round": round_num}
-            )
-            time.sleep(0.5)
-            yield sse_event("elimination", {"eliminated": loser, "round": round_num})
-
-            # Handle elimination
-            if loser in active_members:
-                # Archive the loser's last perspective
-                eliminated_answers[loser] = current_answers[loser]
-                active_members.remove(loser)
-
-            time.sleep(1)
-            round_num += 1
-
-        # --- FINAL ---
-        # The survivor synthesizes
-        yield sse_event("phase", {"phase": "ensemble", "survivors": active_members})
-
-        final_answers = {m: last_answers.get(m, "") for m in active_members}
-
-        # Determine synthesizer: Survivor if 1 left, otherwise Arbiter
-        if len(active_members) == 1:
-            survivor = active_members[0]
-            synthesizer = survivor
-        else:
-            survivor = None
-            synthesizer = None  # Defaults to ARBITER_MODEL in ensemble_result
-
-        # Call ensemble
-        master_answer = ensemble_result(
-            question,
-            final_answers,
-            eliminated_answers=eliminated_answers,
-            synthesizer_id=synthesizer,
-        )
+        # Phase: Arbiter Elimination
+        yield ("phase", {"phase": "arbiter", "round": round_num})
+        yield ("arbiter_thinking", {})
+        _pause(cancel_token, 0.5)
 
-        yield sse_event(
-            "final_answer", {"answer": master_answer, "survivors": active_members}
+        loser, reasoning = arbiter_eliminate(
+            question, current_answers, votes, map_data, cancel_token=cancel_token
         )
-        yield sse_event("end", {})
-
-    return Response(
-        stream_with_context(generate()),
-        mimetype="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        yield ("arbiter_decision", {"reasoning": reasoning, "round": round_num})
+        _pause(cancel_token, 0.5)
+        yield ("elimination", {"eliminated": loser, "round": round_num})
+
+        # Handle elimination
+        if loser in active_members:
+            # Archive the loser's last perspective
+            eliminated_answers[loser] = current_answers[loser]
+            active_members.remove(loser)
+
+        _pause(cancel_token, 1)
+        round_num += 1
+
+    # --- FINAL ---
+    # The survivor synthesizes
+    yield ("phase", {"phase": "ensemble", "survivors": active_members})
+
+    final_answers = {m: last_answers.get(m, "") for m in active_members}
+
+    # Determine synthesizer: Survivor if 1 left, otherwise Arbiter
+    if len(active_members) == 1:
+        survivor = active_members[0]
+        synthesizer = survivor
+    else:
+        survivor = None
+        synthesizer = None  # Defaults to ARBITER_MODEL in ensemble_result
+
+    # Call ensemble
+    master_answer = ensemble_result(
+        question,
+        final_answers,
+        eliminated_answers=eliminated_answers,
+        synthesizer_id=synthesizer,
+        cancel_token=cancel_token,
     )
 
+    yield ("final_answer", {"answer": master_answer, "survivors": active_members})
+    yield ("end", {})
+
 
-def sse_event(event_type, data):
-    """Format a Server-Sent Event."""
-    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+def _pause(cancel_token, seconds):
+    """Pacing delay between UI events, traced so it shows up next to LLM time."""
+    with tracing.span("sleep", cat="pacing", seconds=seconds):
+        cancel_token.sleep(seconds)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+"""
+End-to-end throughput benchmark: the real app under gunicorn with N workers.
+
+Starts a stub LLM endpoint (answers, votes and arbiter verdicts after a fixed
+delay), launches `gunicorn --workers N app:app` pointed at it, then keeps
+`--clients` concurrent POST /api/convene streams busy until `--deliberations`
+have completed. Reports completed deliberations/s, latency and 503 rejections
+per worker count. The app's UI pacing sleeps are included, as in production.
+
+Usage:
+    pip install gunicorn
+    python benchmarks/gunicorn_throughput.py
+    python benchmarks/gunicorn_throughput.py --workers 1 2 4 --clients 12 \
+        --deliberations 48 --llm-delay 0.5 --state-backend redis://localhost:6379/15
+"""
+
+import argparse
+import http.server
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubLLM(http.server.BaseHTTPRequestHandler):
+    """Minimal /v1/chat/completions: plausible answers after `delay` seconds."""
+
+    delay = 0.2
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = payload["messages"][-1]["content"]
+        time.sleep(self.delay)
+        if "Grand Arbiter" in prompt:
+            model_id = re.search(r"Model ID '([^']+)'", prompt).group(1)
+            content = f"ELIMINATE: {model_id} - weakest answer"
+        elif "WORST answer" in prompt:
+            content = "VOTE: Answer #1 - weakest answer"
+        else:
+            content = "A stub answer from the benchmark LLM."
+        body = json.dumps(
+            {
+                "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 10},
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, port, env):
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "--workers", str(workers),
+            "--threads", str(threads),
+            "--timeout", "0",
+            "--bind", f"127.0.0.1:{port}",
+            "app:app",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/config", timeout=1)
+            return proc
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("gunicorn did not start (is it installed?)")
+
+
+def convene(base_url):
+    """Run one deliberation to the end. Returns (completed, seconds, rejected)."""
+    started = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/api/convene", json={"question": "Benchmark question?"}, stream=True
+    )
+    if response.status_code == 503:
+        retry_after = float(response.headers.get("Retry-After", "1"))
+        response.close()
+        return False, retry_after, True
+    completed = False
+    for line in response.iter_lines(decode_unicode=True):
+        if line == "event: final_answer":
+            completed = True
+    return completed, time.perf_counter() - started, False
+
+
+def run(workers, args, env):
+    port = free_port()
+    proc = start_gunicorn(workers, args.threads, port, env)
+    base_url = f"http://127.0.0.1:{port}"
+    lock = threading.Lock()
+    remaining = [args.deliberations]
+    latencies, rejected, failed = [], [0], [0]
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            while True:
+                completed, seconds, was_rejected = convene(base_url)
+                if not was_rejected:
+                    break
+                with lock:
+                    rejected[0] += 1
+                time.sleep(min(seconds, 1.0))
+            with lock:
+                if completed:
+                    latencies.append(seconds)
+                else:
+                    failed[0] += 1
+
+    try:
+        started = time.perf_counter()
+        clients = [threading.Thread(target=client) for _ in range(args.clients)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return {
+        "per_s": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "max": max(latencies, default=0.0),
+        "rejected": rejected[0],
+        "failed": failed[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn --threads")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--deliberations", type=int, default=24)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=3,
+        help="MAX_CONCURRENT_DELIBERATIONS (and MAX_QUEUED_DELIBERATIONS) per worker",
+    )
+    parser.add_argument(
+        "--state-backend",
+        help="STATE_BACKEND for the app. Default: a temp sqlite file.",
+    )
+    args = parser.parse_args()
+
+    StubLLM.delay = args.llm_delay
+    llm_port = free_port()
+    llm = http.server.ThreadingHTTPServer(("127.0.0.1", llm_port), StubLLM)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+
+    env = dict(
+        os.environ,
+        API_URL=f"http://127.0.0.1:{llm_port}/v1/chat/completions",
+        HF_TOKEN="benchmark",
+        STATE_BACKEND=args.state_backend
+        or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "council-bench.db"),
+        MAX_CONCURRENT_DELIBERATIONS=str(args.max_concurrent),
+        MAX_QUEUED_DELIBERATIONS=str(args.max_concurrent),
+        TRACE_SAMPLE_RATE="0",
+    )
+
+    print(
+        f"{'workers':>7} {'delib/s':>8} {'p50 s':>7} {'max s':>7} {'503s':>6} {'failed':>7}"
+    )
+    for workers in args.workers:
+        result = run(workers, args, env)
+        print(
+            f"{workers:>7} {result['per_s']:>8.2f} {result['p50']:>7.2f} "
+            f"{result['max']:>7.2f} {result['rejected']:>6} {result['failed']:>7}"
+        )
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
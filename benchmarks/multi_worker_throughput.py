@@ -0,0 +1,110 @@
+"""
+Multi-worker throughput benchmark for the shared state backends.
+
+Each worker process replays the state traffic of real deliberations (metric
+increments, event-log appends, record reads/writes) against one backend, the
+way N gunicorn workers would. Reports deliberations/s and ops/s per worker
+count, and checks that the shared counters add up across workers.
+
+Usage:
+    python benchmarks/multi_worker_throughput.py
+    python benchmarks/multi_worker_throughput.py --backend sqlite:////tmp/bench.db \
+        --backend redis://localhost:6379/15 --workers 1 2 4 8 --deliberations 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat.state import create_backend  # noqa: E402
+
+# Per deliberation, roughly what app.py and chat/council.py write for a
+# three-member council: ~27 SSE events, ~10 LLM calls, 4 record updates.
+EVENTS = 27
+LLM_CALLS = 10
+RECORD_UPDATES = 4
+
+
+def simulate(spec, deliberations, counter_name, start_barrier, results):
+    backend = create_backend(spec)
+    start_barrier.wait()
+    started = time.perf_counter()
+    for _ in range(deliberations):
+        deliberation_id = uuid.uuid4().hex
+        for _ in range(RECORD_UPDATES):
+            key = f"deliberation:{deliberation_id}"
+            backend.update(key, {"id": deliberation_id, "status": "running"}, ttl=60)
+        for i in range(EVENTS):
+            backend.append(f"log:{deliberation_id}", ["event", {"seq": i}], ttl=60)
+        for _ in range(LLM_CALLS):
+            backend.incr("llm_calls_bench")
+        backend.incr(counter_name)
+    elapsed = time.perf_counter() - started
+    # Memory backends are per process: each worker only sees its own count.
+    results.put((elapsed, backend.counters().get(counter_name, 0)))
+
+
+def run(spec, workers, deliberations):
+    ctx = multiprocessing.get_context("spawn")
+    counter_name = f"bench_{uuid.uuid4().hex[:8]}"
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=simulate,
+            args=(spec, deliberations, counter_name, barrier, results),
+        )
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in range(workers)]
+    for p in procs:
+        p.join()
+
+    elapsed = max(e for e, _ in outcomes)
+    seen = max(count for _, count in outcomes)
+    total = workers * deliberations
+    ops = total * (RECORD_UPDATES + EVENTS + LLM_CALLS + 1)
+    return {
+        "deliberations_per_s": total / elapsed,
+        "ops_per_s": ops / elapsed,
+        "consistent": seen == total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        help="STATE_BACKEND spec (repeatable). Default: memory and a temp sqlite file.",
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--deliberations", type=int, default=100)
+    args = parser.parse_args()
+
+    specs = args.backend or [
+        "memory",
+        "sqlite:///" + os.path.join(tempfile.mkdtemp(), "council-bench.db"),
+    ]
+
+    print(f"{'backend':<40} {'workers':>7} {'delib/s':>10} {'ops/s':>10}  shared")
+    for spec in specs:
+        for workers in args.workers:
+            result = run(spec, workers, args.deliberations)
+            print(
+                f"{spec[:40]:<40} {workers:>7} "
+                f"{result['deliberations_per_s']:>10.1f} {result['ops_per_s']:>10.0f}  "
+                f"{'yes' if result['consistent'] else 'NO'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
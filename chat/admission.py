@@ -0,0 +1,148 @@
+# chat/admission.py
+# Admission control for /api/convene: a cap on concurrent deliberations plus a
+# bounded FIFO wait queue whose size follows the observed deliberation latency.
+
+import heapq
+import math
+import threading
+import time
+from collections import deque
+
+
+class Ticket:
+    """A caller's place in line. Admitted once `wait()` returns True."""
+
+    def __init__(self, controller):
+        self._controller = controller
+        self.admitted = False
+        self.admitted_at = None
+        self.released = False
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds for a slot. Returns True once admitted."""
+        return self._controller._wait(self, timeout)
+
+    @property
+    def position(self):
+        """1-based position in the wait queue (0 once admitted)."""
+        return self._controller._position(self)
+
+    @property
+    def estimated_wait(self):
+        """Seconds until this ticket is expected to be admitted."""
+        return self._controller._estimate_wait(self.position)
+
+    def release(self, completed=False):
+        """
+        Give the slot back (or leave the queue). Pass completed=True when the
+        deliberation ran to the end so its latency feeds the estimate.
+        """
+        self._controller._release(self, completed)
+
+
+class AdmissionController:
+    """
+    Caps concurrent deliberations at `max_active` and lets up to `max_queued`
+    callers wait for a slot. When `max_wait` is set, the queue also shrinks so
+    that nobody is queued behind more than `max_wait` seconds of work, based on
+    an exponentially weighted average of completed deliberation latencies.
+    """
+
+    def __init__(
+        self, max_active, max_queued, max_wait=None, initial_latency=60.0, alpha=0.2
+    ):
+        self.max_active = max(1, max_active)
+        self.max_queued = max(0, max_queued)
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.avg_latency = initial_latency
+        self._cond = threading.Condition()
+        self._active = {}  # {ticket: admitted_at}
+        self._waiting = deque()
+
+    def try_enter(self):
+        """Return an admitted or queued Ticket, or None if the queue is full."""
+        ticket = Ticket(self)
+        with self._cond:
+            if len(self._active) < self.max_active and not self._waiting:
+                self._admit(ticket)
+            elif len(self._waiting) < self.queue_capacity():
+                self._waiting.append(ticket)
+            else:
+                return None
+        return ticket
+
+    def queue_capacity(self):
+        """How many callers may wait right now, given the observed latency."""
+        if self.max_wait is None:
+            return self.max_queued
+        waves = self.max_wait / max(self.avg_latency, 1e-3)
+        return min(self.max_queued, int(waves * self.max_active))
+
+    def retry_after(self):
+        """Seconds a rejected caller should back off: roughly until the next slot frees."""
+        return max(1, math.ceil(self._estimate_wait(1)))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": len(self._active),
+                "queued": len(self._waiting),
+                "max_active": self.max_active,
+                "queue_capacity": self.queue_capacity(),
+                "avg_latency": round(self.avg_latency, 2),
+            }
+
+    # --- internals (self._cond is re-entrant) ---
+
+    def _admit(self, ticket):
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        self._active[ticket] = ticket.admitted_at
+
+    def _wait(self, ticket, timeout):
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket.admitted, timeout)
+
+    def _position(self, ticket):
+        with self._cond:
+            if ticket.admitted or ticket.released:
+                return 0
+            return self._waiting.index(ticket) + 1
+
+    def _estimate_wait(self, position):
+        """
+        Simulate the slots: each active deliberation frees its slot after its
+        remaining expected time, and each freed slot then serves the next caller
+        for one average latency. The `position`-th freed slot is ours.
+        """
+        if position <= 0:
+            return 0.0
+        with self._cond:
+            now = time.monotonic()
+            slots = [
+                max(self.avg_latency - (now - started), 0.0)
+                for started in self._active.values()
+            ]
+            slots += [0.0] * (self.max_active - len(slots))
+            heapq.heapify(slots)
+            for _ in range(position - 1):
+                heapq.heappush(slots, heapq.heappop(slots) + self.avg_latency)
+            return slots[0]
+
+    def _release(self, ticket, completed):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted:
+                started = self._active.pop(ticket)
+                if completed:
+                    latency = time.monotonic() - started
+                    self.avg_latency += self.alpha * (latency - self.avg_latency)
+            else:
+                self._waiting.remove(ticket)
+
+            while self._waiting and len(self._active) < self.max_active:
+                self._admit(self._waiting.popleft())
+            self._cond.notify_all()
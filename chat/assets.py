@@ -0,0 +1,168 @@
+# chat/assets.py
+# Frontend asset pipeline: minify static/src/*.css|js, fingerprint them by
+# content hash and pre-compress gzip/brotli variants.
+#
+#   python -m chat.assets            # build into static/dist (done in the Dockerfile)
+#
+# At runtime the app loads static/dist if present and otherwise builds the
+# same bundle in memory at startup.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+
+from chat.sse import negotiate_encoding
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always produced
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, "static", "src")
+DIST_DIR = os.path.join(ROOT, "static", "dist")
+MANIFEST = "manifest.json"
+
+
+def minify_css(text):
+    """rcssmin when installed; otherwise drop comments and redundant whitespace."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(text)
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)  # never before ':' (descendant :pseudo)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    """
+    rjsmin when installed; otherwise a conservative pass that only removes
+    indentation, blank lines and whole-line // comments (newlines are kept so
+    automatic semicolon insertion behaves exactly as before).
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(text)
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def _content_type(name):
+    return f"{mimetypes.guess_type(name)[0]}; charset=utf-8"
+
+
+class Asset:
+    """One response body with its precompressed variants and their ETags."""
+
+    def __init__(self, body, content_type, variants=None):
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.variants = {None: body}
+        if variants is None:
+            variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=11)
+        for encoding, data in variants.items():
+            # Only keep a variant when it actually saves bytes.
+            if len(data) < len(body):
+                self.variants[encoding] = data
+
+    def etag_for(self, encoding):
+        """Strong ETag of one variant: a different content-coding is a different tag."""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    def select(self, accept_encoding):
+        """Return (encoding, body) for the client's Accept-Encoding."""
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding == "br" and "br" not in self.variants:
+            encoding = "gzip" if "gzip" in (accept_encoding or "") else None
+        if encoding not in self.variants:
+            encoding = None
+        return encoding, self.variants[encoding]
+
+
+def _fingerprint(name, body):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+
+
+def _compile(src_dir):
+    """Yield (logical name, fingerprinted name, minified bytes) per source file."""
+    for name in sorted(os.listdir(src_dir)):
+        ext = os.path.splitext(name)[1]
+        if ext not in MINIFIERS:
+            continue
+        with open(os.path.join(src_dir, name), encoding="utf-8") as f:
+            body = MINIFIERS[ext](f.read()).encode("utf-8")
+        yield name, _fingerprint(name, body), body
+
+
+def build(src_dir=SRC_DIR, dist_dir=DIST_DIR):
+    """Write minified, fingerprinted and precompressed assets plus a manifest."""
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for name, fingerprinted, body in _compile(src_dir):
+        asset = Asset(body, _content_type(name))
+        path = os.path.join(dist_dir, fingerprinted)
+        for encoding, data in asset.variants.items():
+            suffix = {None: "", "gzip": ".gz", "br": ".br"}[encoding]
+            with open(path + suffix, "wb") as f:
+                f.write(data)
+        manifest[name] = fingerprinted
+        print(f"📦 {name} -> {fingerprinted} ({len(body)} bytes minified)")
+    with open(os.path.join(dist_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _load_dist(dist_dir):
+    with open(os.path.join(dist_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    assets = {}
+    for name, fingerprinted in manifest.items():
+        path = os.path.join(dist_dir, fingerprinted)
+        with open(path, "rb") as f:
+            body = f.read()
+        variants = {}
+        for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+            if os.path.exists(path + suffix):
+                with open(path + suffix, "rb") as f:
+                    variants[encoding] = f.read()
+        assets[fingerprinted] = Asset(body, _content_type(name), variants)
+    return manifest, assets
+
+
+def load(src_dir=SRC_DIR, dist_dir=DIST_DIR):
+    """
+    Return (manifest, assets): {logical name: fingerprinted name} and
+    {fingerprinted name: Asset}. Uses a prebuilt dist directory when present,
+    else compiles in memory (e.g. on Vercel, which has no build step here).
+    """
+    if os.path.exists(os.path.join(dist_dir, MANIFEST)):
+        return _load_dist(dist_dir)
+    manifest, assets = {}, {}
+    for name, fingerprinted, body in _compile(src_dir):
+        manifest[name] = fingerprinted
+        assets[fingerprinted] = Asset(body, _content_type(name))
+    return manifest, assets
+
+
+if __name__ == "__main__":
+    build(*sys.argv[1:3])
@@ -0,0 +1,77 @@
+# chat/cancellation.py
+# Cooperative cancellation shared by one deliberation and all of its LLM calls
+
+import threading
+
+
+class DeliberationCancelled(Exception):
+    """Raised inside the council pipeline once its cancel token has fired."""
+
+
+class CancelToken:
+    """
+    A one-shot flag that the SSE handler sets when the client goes away.
+    Long waits (LLM calls, pacing sleeps) wait on the token instead of blocking,
+    and registered callbacks (e.g. closing an HTTP session) run on cancel.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """Fire the token once and run every registered callback."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️  Cancel callback failed: {type(e).__name__}: {e}")
+
+    def on_cancel(self, callback):
+        """
+        Register a callback to run on cancel (immediately if already cancelled).
+        Returns a function that unregisters it.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout):
+        """Sleep for up to `timeout` seconds. Returns True if cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds):
+        """Like time.sleep, but raises DeliberationCancelled as soon as the token fires."""
+        if self._event.wait(seconds):
+            raise DeliberationCancelled(self.reason)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise DeliberationCancelled(self.reason)
+
+
+def check_cancelled(cancel_token):
+    """Raise DeliberationCancelled if `cancel_token` is set (None is never cancelled)."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
@@ -5,3 +5,25 @@ COUNCIL_MEMBERS = [
 ]
 
 ARBITER_MODEL = "google/gemma-3-27b-it"
+
+# Generation settings per council phase, passed straight to query_llm.
+# Votes and the arbiter's verdict are a single line, so those phases stop at
+# the first newline and run cooler; answers and the final synthesis get room.
+PHASE_SETTINGS = {
+    "answer": {"max_tokens": 200, "temperature": 0.7},
+    "vote": {"max_tokens": 60, "temperature": 0.2, "stop": ["\n"]},
+    "arbiter": {"max_tokens": 80, "temperature": 0.2, "stop": ["\n"]},
+    "ensemble": {"max_tokens": 500, "temperature": 0.7},
+}
+
+# Free-form retry used when a constrained vote or verdict can't be parsed:
+# the original "explain, then end with VOTE/ELIMINATE" prompt, no stop sequence.
+FALLBACK_PHASE_SETTINGS = {
+    "vote": {"max_tokens": 100, "temperature": 0.2},
+    "arbiter": {"max_tokens": 150, "temperature": 0.2},
+}
+
+# Models whose router backend honours `response_format` JSON schemas. Their
+# votes and verdicts are requested as JSON; everyone else gets the one-line
+# text format above. Unsupported requests fall back to free-form text.
+STRUCTURED_OUTPUT_MODELS = []
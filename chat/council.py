@@ -3,7 +3,23 @@
 
 import requests
 import os
+import re
+import json
+import socket
+import weakref
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from chat import metrics
+from chat.cancellation import check_cancelled
+from chat.tracing import span, traced
+from chat.config import (
+    PHASE_SETTINGS,
+    FALLBACK_PHASE_SETTINGS,
+    STRUCTURED_OUTPUT_MODELS,
+)
 
 load_dotenv()
 
@@ -19,25 +35,158 @@ API_URL = os.getenv("API_URL", "https://router.huggingface.co/v1/chat/completion
 headers = {"Authorization": f"Bearer {HF_TOKEN}", "Content-Type": "application/json"}
 
 
-def query_llm(model_id, messages, max_tokens=200):
+class _TrackingMixin:
+    """Records every connection a pool opens. Must come first in the bases:
+    HTTPSConnectionPool._new_conn does not call super()."""
+
+    live_connections = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        if self.live_connections is not None:
+            self.live_connections.add(conn)
+        return conn
+
+
+class _TrackedHTTPConnectionPool(_TrackingMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackedHTTPSConnectionPool(_TrackingMixin, HTTPSConnectionPool):
+    pass
+
+
+class _AbortablePoolManager(PoolManager):
+    """PoolManager that remembers its connections so they can be torn down mid-request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.live_connections = weakref.WeakSet()
+        self.aborted = False
+        self.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        if self.aborted:
+            raise ConnectionAbortedError("request aborted before it was sent")
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.live_connections = self.live_connections
+        return pool
+
+    def abort(self):
+        """Shut down every open socket so a blocked read returns immediately."""
+        self.aborted = True
+        for conn in list(self.live_connections):
+            sock = getattr(conn, "sock", None)
+            if sock is None:
+                continue
+            try:
+                # Bypass the SSL wrapper: we only want the fd torn down.
+                socket.socket.shutdown(sock, socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _AbortableAdapter(HTTPAdapter):
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _AbortablePoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+    def abort(self):
+        self.poolmanager.abort()
+
+
+def _abortable_session():
+    """A requests.Session whose in-flight calls can be aborted from another thread."""
+    session = requests.Session()
+    adapter = _AbortableAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def abort():
+        adapter.abort()
+        session.close()
+
+    return session, abort
+
+
+def _was_aborted(model_id, cancel_token):
+    """True (and counted) if a failed call was caused by cancelling its deliberation."""
+    if cancel_token is None or not cancel_token.cancelled:
+        return False
+    metrics.increment("llm_calls_cancelled")
+    print(f"🛑 {model_id} - request aborted, deliberation cancelled")
+    return True
+
+
+def query_llm(
+    model_id,
+    messages,
+    max_tokens=200,
+    cancel_token=None,
+    temperature=0.7,
+    stop=None,
+    response_format=None,
+):
     """
     Generic wrapper to send messages to the Inference API.
     Returns the content string or None if failed.
+    `stop` and `response_format` are forwarded to the router when given.
+    If `cancel_token` fires while the request is outstanding, the connection
+    is shut down and None is returned right away.
     """
+    if cancel_token is not None and cancel_token.cancelled:
+        # Queued work for an abandoned deliberation: never hits the network.
+        metrics.increment("llm_calls_cancelled")
+        print(f"🛑 {model_id} - skipped, deliberation cancelled")
+        return None
+
     payload = {
         "model": model_id,
         "messages": messages,
         "max_tokens": max_tokens,
         "stream": False,
-        "temperature": 0.7,
+        "temperature": temperature,
     }
+    if stop:
+        payload["stop"] = stop
+    if response_format:
+        payload["response_format"] = response_format
+
+    with span(model_id, cat="llm", model=model_id, max_tokens=max_tokens) as llm_span:
+        return _send(model_id, payload, cancel_token, llm_span)
+
+
+def _send(model_id, payload, cancel_token, llm_span):
+    """POST one chat completion; the body of query_llm."""
+    if cancel_token is None:
+        post = requests.post
+        unregister = None
+    else:
+        session, abort = _abortable_session()
+        post = session.post
+        unregister = cancel_token.on_cancel(abort)
 
+    metrics.increment("llm_calls")
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=30)
+        response = post(API_URL, headers=headers, json=payload, timeout=30)
 
         # Log the response status
         print(f"🔍 {model_id} - Status: {response.status_code}")
 
+        if llm_span.recording:
+            llm_span.set(
+                status=response.status_code,
+                request_bytes=len(response.request.body or b""),
+                response_bytes=len(response.content),
+            )
+
         if response.status_code != 200:
             error_text = response.text[:500]  # First 500 chars of error
             print(f"❌ {model_id} failed with {response.status_code}: {error_text}")
@@ -46,6 +195,13 @@ def query_llm(model_id, messages, max_tokens=200):
         response.raise_for_status()
         data = response.json()
 
+        if llm_span.recording:
+            usage = data.get("usage") or {}
+            llm_span.set(
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+            )
+
         if "choices" in data:
             content = data["choices"][0]["message"]["content"].strip()
             preview = content[:150] + "..." if len(content) > 150 else content
@@ -56,19 +212,197 @@ def query_llm(model_id, messages, max_tokens=200):
             print(f"⚠️  Unexpected format from {model_id}: {data}")
             return None
     except requests.exceptions.Timeout:
+        llm_span.set(outcome="timeout")
         print(f"⏱️  Timeout querying {model_id} after 30 seconds")
         return None
     except requests.exceptions.RequestException as e:
+        if _was_aborted(model_id, cancel_token):
+            llm_span.set(outcome="cancelled")
+            return None
+        llm_span.set(outcome="network_error")
         print(f"❌ Network error querying {model_id}: {e}")
         if hasattr(e, "response") and e.response is not None:
             print(f"   Response body: {e.response.text[:500]}")
         return None
     except Exception as e:
+        if _was_aborted(model_id, cancel_token):
+            llm_span.set(outcome="cancelled")
+            return None
+        llm_span.set(outcome="error")
         print(f"❌ Unexpected error querying {model_id}: {type(e).__name__}: {e}")
         return None
+    finally:
+        if unregister is not None:
+            unregister()
+            session.close()
+
+
+# JSON schemas for models in STRUCTURED_OUTPUT_MODELS
+VOTE_SCHEMA = {
+    "type": "object",
+    "properties": {"reason": {"type": "string"}, "vote": {"type": "integer"}},
+    "required": ["reason", "vote"],
+}
+ARBITER_SCHEMA = {
+    "type": "object",
+    "properties": {"reason": {"type": "string"}, "eliminate": {"type": "string"}},
+    "required": ["reason", "eliminate"],
+}
+
+_VOTE_RE = re.compile(r"VOTE\W*(?:Answer)?\W*#?\s*(\d+)", re.IGNORECASE)
+_ANSWER_RE = re.compile(r"Answer\s*#\s*(\d+)", re.IGNORECASE)
+_ELIMINATE_RE = re.compile(r"ELIMINATE\W*(.+)", re.IGNORECASE)
+
+
+def _load_json_object(text):
+    """Return the first JSON object in `text` (code fences allowed), or None."""
+    if not text:
+        return None
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        obj = json.loads(text[start : end + 1])
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
 
 
-def get_round_answers(question, active_members, round_num, previous_answers=None):
+def parse_vote(text, num_answers):
+    """
+    Extract the 1-based answer number from a vote, or None.
+    Accepts {"vote": X} JSON, 'VOTE: Answer #X' (last one wins) and, failing
+    those, a lone 'Answer #X' mention.
+    """
+    if not text:
+        return None
+    obj = _load_json_object(text)
+    candidates = []
+    if obj is not None and "vote" in obj:
+        candidates = [str(obj["vote"])]
+    if not candidates:
+        candidates = _VOTE_RE.findall(text)[::-1]
+    if not candidates:
+        mentions = set(_ANSWER_RE.findall(text))
+        candidates = list(mentions) if len(mentions) == 1 else []
+
+    for raw in candidates:
+        digits = re.sub(r"\D", "", raw)
+        if digits and 1 <= int(digits) <= num_answers:
+            return int(digits)
+    return None
+
+
+def parse_elimination(text, model_map):
+    """
+    Extract the model to eliminate from an arbiter verdict, or None.
+    Accepts {"eliminate": ...} JSON, an 'ELIMINATE: <id>' line (by exact ID,
+    ID substring, short name or 'Answer #X'), then any ID mentioned anywhere.
+    """
+    if not text:
+        return None
+    obj = _load_json_object(text)
+    targets = []
+    if obj is not None and obj.get("eliminate"):
+        targets.append(str(obj["eliminate"]))
+    targets += _ELIMINATE_RE.findall(text)[::-1]
+
+    for target in targets:
+        target = target.strip().strip("[]'\"`*. ")
+        if target in model_map:
+            return target
+        # The reason after the ID may name other models: the earliest match wins.
+        model_id = _first_mentioned(target, model_map, lambda m: m)
+        if model_id is None:
+            model_id = _first_mentioned(target.lower(), model_map, _short_name)
+        if model_id is not None:
+            return model_id
+        match = _ANSWER_RE.search(target)
+        if match and 1 <= int(match.group(1)) <= len(model_map):
+            return model_map[int(match.group(1)) - 1]
+
+    return _first_mentioned(text, model_map, lambda m: m)
+
+
+def _short_name(model_id):
+    """'meta-llama/Llama-3.1-8B-Instruct:novita' -> 'llama-3.1-8b-instruct'"""
+    return model_id.split("/")[-1].split(":")[0].lower()
+
+
+def _first_mentioned(text, model_map, name):
+    """The model whose `name(model_id)` occurs earliest in `text` (longest on ties), or None."""
+    found = [
+        (text.find(name(model_id)), -len(name(model_id)), model_id)
+        for model_id in model_map
+        if name(model_id) in text
+    ]
+    return min(found)[2] if found else None
+
+
+def _verdict_line(text, key, template):
+    """Render a JSON verdict in the one-line text format; pass plain text through."""
+    obj = _load_json_object(text)
+    if obj is None or key not in obj:
+        return text
+    line = template.format(obj[key])
+    return f"{line} - {obj['reason']}" if obj.get("reason") else line
+
+
+def _constrained_query(
+    model_id,
+    phase,
+    text_prompt,
+    json_prompt,
+    fallback_prompt,
+    schema,
+    parse,
+    cancel_token=None,
+):
+    """
+    Ask for a short verdict with the phase's constrained settings (JSON schema
+    for STRUCTURED_OUTPUT_MODELS, stop sequence otherwise). If a response
+    arrives but does not parse, retry once with the free-form fallback prompt.
+    Returns: (response_text, parsed_value)
+    """
+    settings = dict(PHASE_SETTINGS[phase])
+    if model_id in STRUCTURED_OUTPUT_MODELS:
+        settings.pop("stop", None)
+        settings["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": phase, "schema": schema},
+        }
+        prompt = json_prompt
+    else:
+        prompt = text_prompt
+
+    response = query_llm(
+        model_id,
+        [{"role": "user", "content": prompt}],
+        cancel_token=cancel_token,
+        **settings,
+    )
+    parsed = parse(response)
+    if parsed is not None or response is None:
+        # A timeout or HTTP error is not retried: it would only double the wait.
+        return response, parsed
+
+    check_cancelled(cancel_token)
+    metrics.increment(f"{phase}_fallbacks")
+    print(f"   ↩️  Unparseable {phase} from {model_id}, retrying free-form")
+    with span(f"{phase} retry", cat="retry", model=model_id, retry=1):
+        response = query_llm(
+            model_id,
+            [{"role": "user", "content": fallback_prompt}],
+            cancel_token=cancel_token,
+            **FALLBACK_PHASE_SETTINGS[phase],
+        )
+    return response, parse(response)
+
+
+@traced("answering")
+def get_round_answers(
+    question, active_members, round_num, previous_answers=None, cancel_token=None
+):
     """
     Queries all active members.
     If Round 2+, includes context of previous answers for re-evaluation.
@@ -80,6 +414,7 @@ def get_round_answers(question, active_members, round_num, previous_answers=None
     current_answers = {}
 
     for idx, member in enumerate(active_members, 1):
+        check_cancelled(cancel_token)
         print(f"\n   [{idx}/{len(active_members)}] Querying {member}...")
         if round_num == 1:
             messages = [{"role": "user", "content": question}]
@@ -97,7 +432,10 @@ def get_round_answers(question, active_members, round_num, previous_answers=None
                 },
             ]
 
-        response = query_llm(member, messages)
+        response = query_llm(
+            member, messages, cancel_token=cancel_token, **PHASE_SETTINGS["answer"]
+        )
+        check_cancelled(cancel_token)
         if response:
             current_answers[member] = response
             answer_preview = response[:200] + "..." if len(response) > 200 else response
@@ -115,7 +453,8 @@ def get_round_answers(question, active_members, round_num, previous_answers=None
     return current_answers
 
 
-def collect_votes(question, answers):
+@traced("voting")
+def collect_votes(question, answers, cancel_token=None):
     """
     Each model sees all answers (anonymized) and votes for the WORST one.
     Returns: (votes_summary, model_map, detailed_votes)
@@ -131,19 +470,40 @@ def collect_votes(question, answers):
     for idx, model_id in enumerate(model_map):
         candidates_text += f"Answer #{idx+1}: {answers[model_id]}\n---\n"
 
-    voting_prompt = (
+    voting_context = (
         f"Question: {question}\n\n"
         f"Here are the proposed answers:\n{candidates_text}\n"
         f"Task: Identify the WORST answer. "
+    )
+    voting_prompt = (
+        f"{voting_context}"
+        f"Reply with a single line: 'VOTE: Answer #X - <one short reason>' where X is the number."
+    )
+    voting_json_prompt = (
+        f"{voting_context}"
+        f'Reply with JSON: {{"reason": "<one short reason>", "vote": X}} where X is the number.'
+    )
+    voting_fallback_prompt = (
+        f"{voting_context}"
         f"Explain briefly why, and end your response with 'VOTE: Answer #X' where X is the number."
     )
 
     for idx, voter in enumerate(answers.keys(), 1):
+        check_cancelled(cancel_token)
         print(f"\n   [{idx}/{len(answers)}] {voter} is voting...")
-        vote_response = query_llm(
-            voter, [{"role": "user", "content": voting_prompt}], max_tokens=100
+        vote_response, choice = _constrained_query(
+            voter,
+            "vote",
+            voting_prompt,
+            voting_json_prompt,
+            voting_fallback_prompt,
+            VOTE_SCHEMA,
+            lambda text: parse_vote(text, len(model_map)),
+            cancel_token=cancel_token,
         )
+        check_cancelled(cancel_token)
         if vote_response:
+            vote_response = _verdict_line(vote_response, "vote", "VOTE: Answer #{}")
             votes_summary.append(f"{voter} voted: {vote_response}")
             detailed_votes[voter] = vote_response
             print(f"   ✅ {voter} voted:")
@@ -160,7 +520,8 @@ def collect_votes(question, answers):
     return votes_summary, model_map, detailed_votes
 
 
-def arbiter_eliminate(question, answers, votes, model_map):
+@traced("arbiter")
+def arbiter_eliminate(question, answers, votes, model_map, cancel_token=None):
     """
     The Arbiter looks at answers and votes, then kills one model.
     Returns: (eliminated_model, reasoning)
@@ -178,29 +539,46 @@ def arbiter_eliminate(question, answers, votes, model_map):
     for v in votes:
         context += f"- {v}\n"
 
-    arbiter_prompt = (
+    arbiter_context = (
         f"{context}\n\n"
         "You are the Grand Arbiter. Based on the answers and the peer votes, identify the single worst model. "
+    )
+    arbiter_prompt = (
+        f"{arbiter_context}"
+        "Reply with a single line: 'ELIMINATE: [exact Model ID] - <your reasoning in one sentence>'."
+    )
+    arbiter_json_prompt = (
+        f"{arbiter_context}"
+        'Reply with JSON: {"reason": "<your reasoning in one sentence>", "eliminate": "<exact Model ID>"}.'
+    )
+    arbiter_fallback_prompt = (
+        f"{arbiter_context}"
         "First explain your reasoning in 1-2 sentences, then end with 'ELIMINATE: [exact Model ID]' on a new line."
     )
 
-    decision = query_llm(
-        ARBITER_MODEL, [{"role": "user", "content": arbiter_prompt}], max_tokens=150
+    check_cancelled(cancel_token)
+    decision, eliminated = _constrained_query(
+        ARBITER_MODEL,
+        "arbiter",
+        arbiter_prompt,
+        arbiter_json_prompt,
+        arbiter_fallback_prompt,
+        ARBITER_SCHEMA,
+        lambda text: parse_elimination(text, model_map),
+        cancel_token=cancel_token,
     )
+    check_cancelled(cancel_token)
 
     # Parse the decision
-    eliminated = None
+    if decision:
+        decision = _verdict_line(decision, "eliminate", "ELIMINATE: {}")
     reasoning = decision if decision else "Failed to get arbiter decision"
 
     if decision:
         print("\n   📜 Arbiter's full decision:")
         print(f"      {decision}")
-        # Try to extract the model ID
-        for model_id in answers.keys():
-            if model_id in decision:
-                eliminated = model_id
-                print(f"\n   🎯 Parsed elimination target: {eliminated}")
-                break
+    if eliminated:
+        print(f"\n   🎯 Parsed elimination target: {eliminated}")
 
     if not eliminated:
         # Fallback if arbiter fails
@@ -212,8 +590,13 @@ def arbiter_eliminate(question, answers, votes, model_map):
     return eliminated, reasoning
 
 
+@traced("ensemble")
 def ensemble_result(
-    question, final_answers, eliminated_answers=None, synthesizer_id=None
+    question,
+    final_answers,
+    eliminated_answers=None,
+    synthesizer_id=None,
+    cancel_token=None,
 ):
     """
     Combines the final answer (survivor) and eliminated answers into one cohesive response.
@@ -256,9 +639,14 @@ def ensemble_result(
     )
 
     print(f"\n   Synthesizing with {target_model}...")
+    check_cancelled(cancel_token)
     final_output = query_llm(
-        target_model, [{"role": "user", "content": ensemble_prompt}], max_tokens=500
+        target_model,
+        [{"role": "user", "content": ensemble_prompt}],
+        cancel_token=cancel_token,
+        **PHASE_SETTINGS["ensemble"],
     )
+    check_cancelled(cancel_token)
 
     if final_output:
         print(f"\n✨ Final answer generated successfully ({len(final_output)} chars)")
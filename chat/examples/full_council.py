@@ -5,6 +5,7 @@ import json
 from dotenv import load_dotenv
 
 from chat.config import COUNCIL_MEMBERS, ARBITER_MODEL
+from chat import tracing
 
 
 load_dotenv()
@@ -34,10 +35,18 @@ def query_llm(model_id, messages, max_tokens=200):
     }
     
     try:
-        response = requests.post(API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        
+        with tracing.span(model_id, cat="llm", model=model_id, max_tokens=max_tokens) as llm_span:
+            response = requests.post(API_URL, headers=headers, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            usage = data.get("usage") or {}
+            llm_span.set(
+                status=response.status_code,
+                response_bytes=len(response.content),
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+            )
+
         if "choices" in data:
             return data["choices"][0]["message"]["content"].strip()
         else:
@@ -49,6 +58,7 @@ def query_llm(model_id, messages, max_tokens=200):
 
 # --- STAGE 1: GET ANSWERS ---
 
+@tracing.traced("answering")
 def get_round_answers(question, active_members, round_num, previous_answers=None, previous_votes=None, eliminated_model=None):
     """
     Queries all active members. 
@@ -105,6 +115,7 @@ def get_round_answers(question, active_members, round_num, previous_answers=None
 
 # --- STAGE 2: PEER VOTING ---
 
+@tracing.traced("voting")
 def collect_votes(question, answers):
     """
     Each model sees all answers (anonymized) and votes for the WORST one.
@@ -137,6 +148,7 @@ def collect_votes(question, answers):
 
 # --- STAGE 3: ARBITER ELIMINATION ---
 
+@tracing.traced("arbiter")
 def arbiter_eliminate(question, answers, votes, model_map):
     """
     The Arbiter looks at answers and votes, then kills one model.
@@ -178,6 +190,7 @@ def arbiter_eliminate(question, answers, votes, model_map):
 
 # --- STAGE 4: FINAL ENSEMBLE ---
 
+@tracing.traced("ensemble")
 def ensemble_result(question, final_answers):
     """
     Combines the final 3 answers into one cohesive response.
@@ -244,9 +257,26 @@ def convene_council(user_prompt):
     print("\n" + "="*60)
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        question = " ".join(sys.argv[1:])
+    # Optional: --trace out.json writes a Chrome trace (open in ui.perfetto.dev)
+    args = sys.argv[1:]
+    trace_path = None
+    if "--trace" in args:
+        i = args.index("--trace")
+        if i + 1 >= len(args):
+            sys.exit("usage: full_council.py [--trace FILE] [question ...]")
+        trace_path = args[i + 1]
+        del args[i:i + 2]
+
+    if args:
+        question = " ".join(args)
     else:
         question = input("Enter your question for the council: ")
-    
-    convene_council(question)
\ No newline at end of file
+
+    trace = tracing.start_trace("cli", name="full_council", force=trace_path is not None)
+    with tracing.activate(trace), tracing.span("deliberation", cat="deliberation"):
+        convene_council(question)
+
+    if trace is not None:
+        with open(trace_path, "w") as f:
+            json.dump(trace.to_chrome(), f)
+        print(f"\n🧭  Trace written to {trace_path}")
\ No newline at end of file
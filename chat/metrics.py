@@ -0,0 +1,18 @@
+# chat/metrics.py
+# Counters exposed on /api/metrics, kept in the shared state backend so every
+# worker adds to (and reports) the same totals.
+
+from chat.state import get_backend
+
+
+def increment(name, amount=1):
+    """Add `amount` to the counter `name`. A state backend outage never breaks a caller."""
+    try:
+        get_backend().incr(name, amount)
+    except Exception as e:
+        print(f"⚠️  Could not record metric {name}: {type(e).__name__}: {e}")
+
+
+def snapshot():
+    """Return a copy of all counters."""
+    return get_backend().counters()
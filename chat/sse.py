@@ -0,0 +1,149 @@
+# chat/sse.py
+# Server-Sent Events transport: compact JSON, optional gzip/brotli, coalesced
+# flushes, heartbeat comments and `id:` fields for Last-Event-ID resumption.
+
+import json
+import queue
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+
+def dumps(data):
+    """Serialize event data as compact JSON (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def format_event(event_type, data, event_id=None):
+    """Format one Server-Sent Event."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {dumps(data)}\n\n"
+
+
+def negotiate_encoding(accept_encoding, enabled=True):
+    """Pick 'br', 'gzip' or None from an Accept-Encoding header."""
+    if not enabled or not accept_encoding:
+        return None
+    offered = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        if q > 0:
+            offered.add(name.strip().lower())
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+class EventStream:
+    """
+    Turns events into wire chunks for one SSE response. Every flush is
+    compressed with a sync flush so the browser can decode it immediately.
+    Counts events, raw and on-the-wire bytes, and flushes.
+    """
+
+    def __init__(self, encoding=None):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+        else:
+            self._compressor = None
+        self.events = 0
+        self.flushes = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+
+    def flush(self, chunks):
+        """Encode a list of formatted events/comments into one wire chunk."""
+        data = "".join(chunks).encode("utf-8")
+        self.raw_bytes += len(data)
+        if self.encoding == "gzip":
+            data = self._compressor.compress(data) + self._compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        elif self.encoding == "br":
+            data = self._compressor.process(data) + self._compressor.flush()
+        self.flushes += 1
+        self.wire_bytes += len(data)
+        return data
+
+    def close(self):
+        """Finish the compressed stream (gzip trailer / brotli final block)."""
+        data = b""
+        if self.encoding == "gzip":
+            data = self._compressor.flush(zlib.Z_FINISH)
+        elif self.encoding == "br":
+            data = self._compressor.finish()
+        self.wire_bytes += len(data)
+        return data
+
+    def event(self, event_type, data, event_id=None):
+        self.events += 1
+        return format_event(event_type, data, event_id)
+
+    def heartbeat(self):
+        """A comment line: ignored by clients, keeps proxies from timing out."""
+        return self.flush([": heartbeat\n\n"])
+
+    def stats(self):
+        return {
+            "encoding": self.encoding or "identity",
+            "events": self.events,
+            "flushes": self.flushes,
+            "raw_bytes": self.raw_bytes,
+            "wire_bytes": self.wire_bytes,
+        }
+
+
+def drain(events, stream, coalesce_window, heartbeat_interval):
+    """
+    Yield wire chunks from a queue of (event_id, event_type, data) items until
+    a None sentinel arrives. Items arriving within `coalesce_window` seconds of
+    the first one share a flush; a heartbeat goes out after
+    `heartbeat_interval` seconds of silence. On the sentinel the stream is
+    closed and True is returned.
+    """
+    while True:
+        try:
+            item = events.get(timeout=heartbeat_interval)
+        except queue.Empty:
+            yield stream.heartbeat()
+            continue
+
+        batch = []
+        deadline = time.monotonic() + coalesce_window
+        while item is not None:
+            event_id, event_type, data = item
+            batch.append(stream.event(event_type, data, event_id))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = events.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        if batch:
+            yield stream.flush(batch)
+        if item is None:
+            yield stream.close()
+            return True
@@ -0,0 +1,278 @@
+# chat/state.py
+# Shared runtime state (metrics, deliberation logs, traces) behind one small
+# interface, so several gunicorn workers or containers see the same data.
+# Records are merged with update(), which is atomic in every backend, so
+# concurrent writers never overwrite each other's fields with stale values.
+#
+# STATE_BACKEND selects the implementation:
+#   memory                      - this process only (default, single worker)
+#   sqlite:////tmp/council.db   - one file shared by all workers on a host (WAL)
+#   redis://localhost:6379/0    - any Redis-compatible server, shared across hosts
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class MemoryBackend:
+    """Process-local state. Right for one worker; invisible to any other."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # {key: (value, expires_at)}
+        self._lists = {}  # {key: ([items], expires_at)}
+        self._counters = {}
+
+    def _live(self, store, key):
+        entry = store.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del store[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(self._values, key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._values[key] = (value, expires_at)
+
+    def update(self, key, fields, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            entry = self._live(self._values, key)
+            value = dict(entry[0] if entry else {}, **fields)
+            self._values[key] = (value, expires_at)
+            return value
+
+    def append(self, key, item, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            entry = self._live(self._lists, key)
+            items = entry[0] if entry else []
+            items.append(item)
+            self._lists[key] = (items, expires_at)
+            return len(items)
+
+    def read_list(self, key, start=0):
+        with self._lock:
+            entry = self._live(self._lists, key)
+            return list(entry[0][start:]) if entry else []
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            return self._counters[name]
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+class SQLiteBackend:
+    """
+    State in a SQLite file in WAL mode: readers never block the writer, so all
+    workers on one host can share it. Each thread keeps its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS lists (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS kv_expiry ON kv (expires_at);
+            CREATE INDEX IF NOT EXISTS lists_key ON lists (key, seq);
+            CREATE INDEX IF NOT EXISTS lists_expiry ON lists (expires_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY, value INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload) or a thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), now + ttl if ttl else None),
+        )
+        # Opportunistic cleanup keeps the file from growing without a janitor.
+        conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+
+    def update(self, key, fields, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        # The write lock is taken before the read, so concurrent merges serialize.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+            value = dict(json.loads(row[0]) if row else {}, **fields)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def append(self, key, item, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO lists (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(item), now + ttl if ttl else None),
+            )
+            (length,) = conn.execute(
+                "SELECT COUNT(*) FROM lists WHERE key = ?", (key,)
+            ).fetchone()
+            if length == 1:
+                conn.execute("DELETE FROM lists WHERE expires_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return length
+
+    def read_list(self, key, start=0):
+        rows = self._conn().execute(
+            "SELECT value FROM lists WHERE key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY seq LIMIT -1 OFFSET ?",
+            (key, time.time(), start),
+        ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def incr(self, name, amount=1):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (name, amount),
+            )
+            (value,) = conn.execute(
+                "SELECT value FROM counters WHERE name = ?", (name,)
+            ).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def counters(self):
+        return dict(self._conn().execute("SELECT name, value FROM counters"))
+
+
+class RedisBackend:
+    """State on a Redis-compatible server (Redis, Valkey, KeyDB, ...)."""
+
+    COUNTERS_KEY = "council:counters"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "STATE_BACKEND is a redis:// URL but the 'redis' package is not installed"
+            )
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key):
+        value = self._redis.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def update(self, key, fields, ttl=None):
+        def merge(pipe):
+            current = pipe.get(key)
+            value = dict(json.loads(current) if current else {}, **fields)
+            pipe.multi()
+            pipe.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+            return value
+
+        # WATCH/MULTI: retried if another writer touches the key in between.
+        return self._redis.transaction(merge, key, value_from_callable=True)
+
+    def append(self, key, item, ttl=None):
+        pipe = self._redis.pipeline()
+        pipe.rpush(key, json.dumps(item))
+        if ttl:
+            pipe.expire(key, int(ttl))
+        return pipe.execute()[0]
+
+    def read_list(self, key, start=0):
+        return [json.loads(value) for value in self._redis.lrange(key, start, -1)]
+
+    def incr(self, name, amount=1):
+        return self._redis.hincrby(self.COUNTERS_KEY, name, amount)
+
+    def counters(self):
+        return {
+            name: int(value)
+            for name, value in self._redis.hgetall(self.COUNTERS_KEY).items()
+        }
+
+
+def create_backend(spec):
+    """Build a backend from a STATE_BACKEND string."""
+    if spec in ("", "memory"):
+        return MemoryBackend()
+    if spec.startswith("sqlite:///"):
+        return SQLiteBackend(spec[len("sqlite:///") :])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown STATE_BACKEND: {spec!r}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend, created on first use from STATE_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.getenv("STATE_BACKEND", "memory"))
+    return _backend
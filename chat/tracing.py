@@ -0,0 +1,183 @@
+# chat/tracing.py
+# Per-deliberation span tracing, exported as Chrome trace-event JSON
+# (open in https://ui.perfetto.dev or chrome://tracing).
+
+import contextlib
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+
+from chat.state import get_backend
+
+# Fraction of deliberations that are traced. 0 disables tracing: span() then
+# returns a shared no-op object and costs one context-variable lookup.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# Seconds a finished trace stays available on /api/trace/<id>.
+TRACE_TTL = int(os.getenv("TRACE_TTL", "3600"))
+
+_current = contextvars.ContextVar("council_trace", default=None)
+
+
+class Trace:
+    """All spans recorded for one deliberation."""
+
+    def __init__(self, trace_id, name="deliberation"):
+        self.trace_id = trace_id
+        self.name = name
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = {}  # {thread ident: small tid}
+
+    def _tid(self):
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            name = threading.current_thread().name
+            self._threads[ident] = (len(self._threads) + 1, name)
+        return self._threads[ident][0]
+
+    def record(self, name, start, end, cat="council", args=None):
+        """Add a complete span; `start`/`end` are time.perf_counter() values."""
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": 1,
+            "args": args or {},
+        }
+        with self._lock:
+            event["tid"] = self._tid()
+            self._events.append(event)
+
+    def to_chrome(self):
+        """Return the trace as a Chrome trace-event JSON object."""
+        with self._lock:
+            events = list(self._events)
+            threads = list(self._threads.values())
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self.name}}
+        ] + [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in threads
+        ]
+        return {
+            "traceEvents": metadata + sorted(events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id},
+        }
+
+
+class Span:
+    """A timed region of a trace. Attributes set via set() land in the event args."""
+
+    recording = True
+
+    def __init__(self, trace, name, cat, attrs):
+        self._trace = trace
+        self.name = name
+        self.cat = cat
+        self.attrs = attrs
+        self._start = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._trace.record(
+            self.name, self._start, time.perf_counter(), self.cat, self.attrs
+        )
+        return False
+
+
+class _NoopSpan:
+    recording = False
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name, cat="council", **attrs):
+    """Time a `with` block in the active trace (no-op when nothing is traced)."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return Span(trace, name, cat, attrs)
+
+
+def traced(name, cat="phase"):
+    """Decorator: wrap every call of the function in span(name)."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, cat):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_trace():
+    return _current.get()
+
+
+def start_trace(trace_id, name="deliberation", force=False, sample_rate=None):
+    """Return a new Trace if this deliberation is sampled (or forced), else None."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if not force and (rate <= 0 or random.random() >= rate):
+        return None
+    return Trace(trace_id, name)
+
+
+@contextlib.contextmanager
+def activate(trace):
+    """Make `trace` the target of span() on this thread; None leaves tracing off."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def store_trace(trace):
+    """
+    Save a finished trace to the shared state backend for get_trace(). A state
+    backend outage loses the trace but never breaks a caller.
+    """
+    try:
+        get_backend().set(f"trace:{trace.trace_id}", trace.to_chrome(), ttl=TRACE_TTL)
+    except Exception as e:
+        print(f"⚠️  Could not store trace {trace.trace_id}: {type(e).__name__}: {e}")
+
+
+def get_trace(trace_id):
+    """Return a stored trace as Chrome trace-event JSON, or None."""
+    return get_backend().get(f"trace:{trace_id}")
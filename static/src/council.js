@@ -0,0 +1,378 @@
+// State
+let members = [];
+let memberElements = {};
+
+// Emoji avatars for models
+const avatars = ['🧙', '🧝', '🧛', '🤖', '👁️', '🦉', '🐉', '⚗️'];
+
+// DOM elements
+const membersContainer = document.getElementById('members-container');
+const questionInput = document.getElementById('question-input');
+const conveneBtn = document.getElementById('convene-btn');
+const phaseDot = document.getElementById('phase-dot');
+const phaseName = document.getElementById('phase-name');
+const statusText = document.getElementById('status-text');
+const logContent = document.getElementById('log-content');
+const answersPanel = document.getElementById('answers-panel');
+const answersContent = document.getElementById('answers-content');
+const finalAnswer = document.getElementById('final-answer');
+const finalAnswerContent = document.getElementById('final-answer-content');
+const arbiterThrone = document.getElementById('arbiter-throne');
+const arbiterName = document.getElementById('arbiter-name');
+const arbiterDecisionBox = document.getElementById('arbiter-decision-box');
+const arbiterDecisionText = document.getElementById('arbiter-decision-text');
+
+// Initialize
+async function init() {
+    try {
+        const res = await fetch('/api/config');
+        const config = await res.json();
+        members = config.members;
+        renderMembers();
+
+        // Set arbiter name
+        if (config.arbiter) {
+            arbiterName.textContent = getShortName(config.arbiter);
+        }
+    } catch (e) {
+        // Fallback demo members
+        members = ['Model-A', 'Model-B', 'Model-C', 'Model-D', 'Model-E'];
+        renderMembers();
+    }
+}
+
+// Render members around the table
+function renderMembers() {
+    membersContainer.innerHTML = '';
+    memberElements = {};
+
+    const chamber = document.querySelector('.council-chamber');
+    const size = chamber.offsetWidth;
+    const centerX = size / 2;
+    const centerY = size / 2;
+    const radius = size * 0.4;
+
+    members.forEach((member, i) => {
+        const angle = (i / members.length) * 2 * Math.PI - Math.PI / 2;
+        const x = centerX + radius * Math.cos(angle);
+        const y = centerY + radius * Math.sin(angle);
+
+        // Determine speech bubble position and arrow direction
+        const bubbleOffset = 110; // Distance from avatar
+        let bubbleX, bubbleY, arrowClass;
+
+        // Position bubble based on angle
+        if (angle >= -Math.PI / 4 && angle < Math.PI / 4) {
+            // Right side
+            bubbleX = x + bubbleOffset;
+            bubbleY = y;
+            arrowClass = 'arrow-left';
+        } else if (angle >= Math.PI / 4 && angle < 3 * Math.PI / 4) {
+            // Bottom side
+            bubbleX = x;
+            bubbleY = y + bubbleOffset;
+            arrowClass = 'arrow-top';
+        } else if (angle >= 3 * Math.PI / 4 || angle < -3 * Math.PI / 4) {
+            // Left side
+            bubbleX = x - bubbleOffset;
+            bubbleY = y;
+            arrowClass = 'arrow-right';
+        } else {
+            // Top side
+            bubbleX = x;
+            bubbleY = y - bubbleOffset;
+            arrowClass = 'arrow-bottom';
+        }
+
+        const el = document.createElement('div');
+        el.className = 'member';
+        el.style.left = `${x}px`;
+        el.style.top = `${y}px`;
+        el.innerHTML = `
+            <div class="member-avatar">${avatars[i % avatars.length]}</div>
+            <div class="member-name">${getShortName(member)}</div>
+        `;
+
+        // Create speech bubble
+        const bubble = document.createElement('div');
+        bubble.className = `speech-bubble ${arrowClass}`;
+        bubble.style.left = `${bubbleX}px`;
+        bubble.style.top = `${bubbleY}px`;
+        bubble.style.transform = 'translate(-50%, -50%) scale(0.8)';
+        bubble.innerHTML = '<div class="speech-text"></div>';
+
+        membersContainer.appendChild(el);
+        membersContainer.appendChild(bubble);
+
+        memberElements[member] = {
+            avatar: el,
+            bubble: bubble,
+            bubbleText: bubble.querySelector('.speech-text')
+        };
+    });
+}
+
+// Get short display name
+function getShortName(modelId) {
+    // Extract last part after /
+    const parts = modelId.split('/');
+    return parts[parts.length - 1].slice(0, 15);
+}
+
+// Add log entry
+function log(message, type = '') {
+    const entry = document.createElement('div');
+    entry.className = `log-entry ${type}`;
+    entry.textContent = `› ${message}`;
+    logContent.appendChild(entry);
+    logContent.scrollTop = logContent.scrollHeight;
+}
+
+// Update status
+function setStatus(phase, text) {
+    phaseName.textContent = phase;
+    statusText.textContent = text;
+}
+
+// Set member state
+function setMemberState(member, state) {
+    const memberObj = memberElements[member];
+    if (!memberObj) return;
+
+    memberObj.avatar.classList.remove('active', 'thinking', 'eliminated');
+    if (state) memberObj.avatar.classList.add(state);
+
+    // Hide bubble when eliminated
+    if (state === 'eliminated') {
+        memberObj.bubble.classList.remove('show');
+    }
+}
+
+// Clear all member states
+function clearMemberStates() {
+    Object.values(memberElements).forEach(memberObj => {
+        memberObj.avatar.classList.remove('active', 'thinking');
+    });
+}
+
+// Clear all speech bubbles
+function clearAllBubbles() {
+    Object.values(memberElements).forEach(memberObj => {
+        memberObj.bubble.classList.remove('show');
+        memberObj.bubbleText.textContent = '';
+    });
+}
+
+// Convene the council
+async function convene() {
+    const question = questionInput.value.trim();
+    if (!question) return;
+
+    // Reset UI
+    conveneBtn.disabled = true;
+    logContent.innerHTML = '';
+    answersContent.innerHTML = '';
+    answersPanel.classList.remove('show');
+    finalAnswer.classList.remove('show');
+    arbiterDecisionBox.classList.remove('show');
+    arbiterThrone.classList.remove('thinking');
+    clearAllBubbles();
+    Object.values(memberElements).forEach(memberObj => {
+        memberObj.avatar.classList.remove('eliminated', 'active', 'thinking');
+    });
+
+    log('Council convened...');
+    setStatus('Convening', 'The council gathers to deliberate...');
+
+    // Use fetch with POST for SSE
+    try {
+        const response = await fetch('/api/convene', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ question })
+        });
+
+        if (response.status === 503) {
+            const retryAfter = response.headers.get('Retry-After');
+            log(`The council chamber is full. Try again in ${retryAfter}s.`, 'elimination');
+            setStatus('At Capacity', 'Too many deliberations in progress.');
+            conveneBtn.disabled = false;
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+
+            // Parse SSE events
+            const lines = buffer.split('\n');
+            buffer = lines.pop() || '';
+
+            let eventType = '';
+            let eventData = '';
+
+            for (const line of lines) {
+                if (line.startsWith('event: ')) {
+                    eventType = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    eventData = line.slice(6);
+                    if (eventType && eventData) {
+                        handleEvent(eventType, JSON.parse(eventData));
+                        eventType = '';
+                        eventData = '';
+                    }
+                }
+            }
+        }
+    } catch (e) {
+        log('Connection error: ' + e.message, 'elimination');
+    }
+
+    conveneBtn.disabled = false;
+}
+
+// Handle SSE events
+function handleEvent(type, data) {
+    switch (type) {
+        case 'queued':
+            setStatus('Queued', `Position ${data.position} in line, about ${data.estimated_wait}s to wait...`);
+            log(`Waiting for a seat at the table (position ${data.position})`);
+            break;
+
+        case 'start':
+            log(`Question: "${data.question}"`);
+            log(`${data.members.length} models seated at the table`);
+            break;
+
+        case 'round_start':
+            setStatus(`Round ${data.round}`, `Round ${data.round} begins...`);
+            log(`═══ ROUND ${data.round} ═══`, 'success');
+            clearMemberStates();
+            clearAllBubbles();
+
+            // Clear previous round's answers
+            answersContent.innerHTML = '';
+            break;
+
+        case 'phase':
+            const phaseNames = {
+                'answering': 'Models Answering',
+                're-evaluating': 'Re-evaluating Answers',
+                'voting': 'Peer Voting',
+                'arbiter': 'Arbiter Judging',
+                'ensemble': 'Final Synthesis'
+            };
+            setStatus(phaseNames[data.phase] || data.phase, `Phase: ${data.phase}`);
+            log(`Phase: ${data.phase}`);
+
+            // Update answers header with round info
+            if (data.round) {
+                document.querySelector('.answers-header').textContent =
+                    `💬 Round ${data.round} Answers`;
+            }
+            break;
+
+        case 'member_thinking':
+            setMemberState(data.member, 'thinking');
+            setStatus('Deliberating', `${getShortName(data.member)} is thinking...`);
+            break;
+
+        case 'member_answered':
+            setMemberState(data.member, 'active');
+            log(`${getShortName(data.member)} answered`);
+
+            // Show answer in speech bubble
+            const memberObj = memberElements[data.member];
+            if (memberObj) {
+                memberObj.bubbleText.textContent = data.answer;
+                memberObj.bubble.classList.add('show');
+            }
+
+            // Show answer in answers panel
+            answersPanel.classList.add('show');
+
+            // Remove 'latest' class from all answer blocks
+            document.querySelectorAll('.answer-block').forEach(el => {
+                el.classList.remove('latest');
+            });
+
+            // Add new answer
+            const answerBlock = document.createElement('div');
+            answerBlock.className = 'answer-block latest';
+            answerBlock.innerHTML = `
+                <div class="answer-member">${getShortName(data.member)}</div>
+                <div class="answer-text">${data.answer}</div>
+            `;
+            answersContent.appendChild(answerBlock);
+            answersContent.scrollTop = answersContent.scrollHeight;
+            break;
+
+        case 'member_voted':
+            setMemberState(data.member, 'active');
+            log(`${getShortName(data.member)} cast their vote`);
+
+            // Show vote in speech bubble
+            const voterObj = memberElements[data.member];
+            if (voterObj) {
+                voterObj.bubbleText.textContent = `🗳️ ${data.vote}`;
+                voterObj.bubble.classList.add('show');
+            }
+            break;
+
+        case 'votes_collected':
+            log('All votes have been cast');
+            clearMemberStates();
+            break;
+
+        case 'arbiter_thinking':
+            arbiterThrone.classList.add('thinking');
+            setStatus('Arbiter Deliberating', 'The Arbiter weighs the evidence...');
+            log('The Arbiter is deliberating...');
+            break;
+
+        case 'arbiter_decision':
+            arbiterThrone.classList.remove('thinking');
+            arbiterDecisionText.textContent = data.reasoning;
+            arbiterDecisionBox.classList.add('show');
+            log('The Arbiter has reached a decision');
+            setStatus('Judgment Rendered', 'The Arbiter has spoken.');
+            break;
+
+        case 'elimination':
+            setMemberState(data.eliminated, 'eliminated');
+            log(`💀 ELIMINATED: ${getShortName(data.eliminated)}`, 'elimination');
+            setStatus('Elimination', `${getShortName(data.eliminated)} has been banished!`);
+            break;
+
+        case 'final_answer':
+            log('The council has reached consensus', 'success');
+            setStatus('Complete', 'The council has spoken.');
+            finalAnswerContent.textContent = data.answer;
+            finalAnswer.classList.add('show');
+
+            // Highlight survivors
+            clearMemberStates();
+            data.survivors.forEach(m => setMemberState(m, 'active'));
+            break;
+
+        case 'end':
+            log('Session complete');
+            break;
+    }
+}
+
+// Event listeners
+conveneBtn.addEventListener('click', convene);
+questionInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') convene();
+});
+
+// Init on load
+window.addEventListener('load', init);
+window.addEventListener('resize', renderMembers);
@@ -0,0 +1,89 @@
+import pytest
+
+from chat.council import _verdict_line, parse_elimination, parse_vote
+
+MODELS = [
+    "deepseek-ai/DeepSeek-V3.2:novita",
+    "google/gemma-3-27b-it",
+    "meta-llama/Llama-3.1-8B-Instruct",
+]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("VOTE: Answer #2 - misses the point", 2),
+        ("vote: answer # 3", 3),
+        ("VOTE: 1", 1),
+        ('{"reason": "too vague", "vote": 3}', 3),
+        ('```json\n{"reason": "off topic", "vote": "2"}\n```', 2),
+        ("Answer #1 is fine but VOTE: Answer #1 ... actually VOTE: Answer #3", 3),
+        ("Answer #2 is clearly the weakest.", 2),
+        ("Answer #1 beats Answer #2.", None),
+        ("VOTE: Answer #7", None),
+        ('{"reason": "none", "vote": 0}', None),
+        ("I cannot decide.", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_vote(text, expected):
+    assert parse_vote(text, len(MODELS)) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("ELIMINATE: google/gemma-3-27b-it - too short", MODELS[1]),
+        ("ELIMINATE: [meta-llama/Llama-3.1-8B-Instruct]", MODELS[2]),
+        ("ELIMINATE: 'deepseek-ai/DeepSeek-V3.2:novita'.", MODELS[0]),
+        # The reason names another model: the eliminated ID comes first.
+        (
+            "ELIMINATE: meta-llama/Llama-3.1-8B-Instruct - its answer is far "
+            "weaker than google/gemma-3-27b-it's",
+            MODELS[2],
+        ),
+        (
+            "ELIMINATE: Llama-3.1-8B-Instruct - worse than gemma-3-27b-it",
+            MODELS[2],
+        ),
+        ("ELIMINATE: deepseek-v3.2 - rambles", MODELS[0]),
+        ("ELIMINATE: Answer #2 - incorrect", MODELS[1]),
+        ('{"reason": "wrong", "eliminate": "google/gemma-3-27b-it"}', MODELS[1]),
+        (
+            "Llama was weak.\nELIMINATE: google/gemma-3-27b-it\n"
+            "ELIMINATE: meta-llama/Llama-3.1-8B-Instruct",
+            MODELS[2],
+        ),
+        ("I would drop meta-llama/Llama-3.1-8B-Instruct.", MODELS[2]),
+        ("ELIMINATE: nobody", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_elimination(text, expected):
+    assert parse_elimination(text, MODELS) == expected
+
+
+@pytest.mark.parametrize(
+    "text, key, template, expected",
+    [
+        (
+            '{"reason": "too vague", "vote": 2}',
+            "vote",
+            "VOTE: Answer #{}",
+            "VOTE: Answer #2 - too vague",
+        ),
+        ('{"vote": 1}', "vote", "VOTE: Answer #{}", "VOTE: Answer #1"),
+        (
+            '{"reason": "wrong", "eliminate": "google/gemma-3-27b-it"}',
+            "eliminate",
+            "ELIMINATE: {}",
+            "ELIMINATE: google/gemma-3-27b-it - wrong",
+        ),
+        ("VOTE: Answer #3 - off topic", "vote", "VOTE: Answer #{}", "VOTE: Answer #3 - off topic"),
+        ('{"reason": "no key"}', "vote", "VOTE: Answer #{}", '{"reason": "no key"}'),
+    ],
+)
+def test_verdict_line(text, key, template, expected):
+    assert _verdict_line(text, key, template) == expected